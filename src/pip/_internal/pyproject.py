@@ -1,9 +1,18 @@
+import copy
+import errno
 import importlib.util
+import itertools
 import os
+import stat
+import sys
 from collections import namedtuple
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    from pip._vendor import tomli as tomllib
 
-from pip._vendor import tomli
 from pip._vendor.packaging.requirements import InvalidRequirement, Requirement
 
 from pip._internal.exceptions import (
@@ -12,15 +21,73 @@ from pip._internal.exceptions import (
     MissingPyProjectBuildRequires,
 )
 
+# The build requirements and backend assumed when a project does not
+# specify them.
+_DEFAULT_REQUIRES = ("setuptools>=40.8.0", "wheel")
+_LEGACY_BACKEND = "setuptools.build_meta:__legacy__"
+
+_ERR_NOT_A_PROJECT = (
+    "{} does not appear to be a Python project: "
+    "neither 'setup.py' nor 'pyproject.toml' found."
+)
+_ERR_PEP517_NO_SETUP_PY = (
+    "Disabling PEP 517 processing is invalid: project does not have a setup.py"
+)
+_ERR_PEP517_HAS_BACKEND = (
+    "Disabling PEP 517 processing is invalid: "
+    "project specifies a build backend of {} "
+    "in pyproject.toml"
+)
+
 
 def _is_list_of_str(obj: Any) -> bool:
-    return isinstance(obj, list) and all(isinstance(item, str) for item in obj)
+    return isinstance(obj, list) and all(map(isinstance, obj, itertools.repeat(str)))
 
 
 def make_pyproject_path(unpacked_source_directory: str) -> str:
     return os.path.join(unpacked_source_directory, "pyproject.toml")
 
 
+# Parsed build-system tables, keyed by (path, mtime, size). The resolver
+# can load the same pyproject.toml many times in a single run, so avoid
+# re-parsing it unless the file has changed. Callers get a copy of the
+# cached table, so mutating the result cannot affect later reads.
+_PARSE_CACHE: Dict[Tuple[str, int, int], Optional[Dict[str, Any]]] = {}
+
+
+def read_pyproject_toml(path: str) -> Optional[Dict[str, Any]]:
+    """Read the ``build-system`` table from the pyproject.toml at ``path``.
+
+    Returns None if the file has no ``build-system`` table, and raises
+    FileNotFoundError if ``path`` is not a file.
+    """
+    # Like os.path.isfile(), treat any failure to stat the path as the
+    # file not existing.
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path) from None
+    if not stat.S_ISREG(st.st_mode):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    try:
+        return copy.deepcopy(_PARSE_CACHE[key])
+    except KeyError:
+        pass
+
+    # Always parse the whole file, even if it has no build-system table,
+    # so that malformed or non-UTF-8 files are reported rather than
+    # silently treated as having no build-system table.
+    with open(path, "rb") as f:
+        data = f.read()
+    # Match the newline translation text mode would do, so files with
+    # bare "\r" line endings still parse.
+    text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    build_system = tomllib.loads(text).get("build-system")
+    _PARSE_CACHE[key] = build_system
+    return copy.deepcopy(build_system)
+
+
 BuildSystemDetails = namedtuple(
     "BuildSystemDetails", ["requires", "backend", "check", "backend_path"]
 )
@@ -50,21 +117,23 @@ def load_pyproject_toml(
                 relative to the project root.
         )
     """
-    has_pyproject = os.path.isfile(pyproject_toml)
+    # The stat that read_pyproject_toml does for its cache key doubles
+    # as the existence check.
+    try:
+        build_system = read_pyproject_toml(pyproject_toml)
+    except FileNotFoundError:
+        has_pyproject = False
+        build_system = None
+    else:
+        has_pyproject = True
     has_setup = os.path.isfile(setup_py)
+    if isinstance(build_system, dict):
+        backend = build_system.get("build-backend")
+    else:
+        backend = None
 
     if not has_pyproject and not has_setup:
-        raise InstallationError(
-            f"{req_name} does not appear to be a Python project: "
-            f"neither 'setup.py' nor 'pyproject.toml' found."
-        )
-
-    if has_pyproject:
-        with open(pyproject_toml, encoding="utf-8") as f:
-            pp_toml = tomli.loads(f.read())
-        build_system = pp_toml.get("build-system")
-    else:
-        build_system = None
+        raise InstallationError(_ERR_NOT_A_PROJECT.format(req_name))
 
     # The following cases must use PEP 517
     # We check for use_pep517 being non-None and falsey because that means
@@ -72,20 +141,17 @@ def load_pyproject_toml(
     # opposed to False can occur when the value is provided via an
     # environment variable or config file option (due to the quirk of
     # strtobool() returning an integer in pip's configuration code).
-    if has_pyproject and not has_setup:
+    if backend is not None and use_pep517 is None:
+        # Most projects specify a build backend and the user has no
+        # preference, so settle that case before the others.
+        use_pep517 = True
+    elif has_pyproject and not has_setup:
         if use_pep517 is not None and not use_pep517:
-            raise InstallationError(
-                "Disabling PEP 517 processing is invalid: "
-                "project does not have a setup.py"
-            )
+            raise InstallationError(_ERR_PEP517_NO_SETUP_PY)
         use_pep517 = True
-    elif build_system and "build-backend" in build_system:
+    elif backend is not None:
         if use_pep517 is not None and not use_pep517:
-            raise InstallationError(
-                "Disabling PEP 517 processing is invalid: "
-                "project specifies a build backend of {} "
-                "in pyproject.toml".format(build_system["build-backend"])
-            )
+            raise InstallationError(_ERR_PEP517_HAS_BACKEND.format(backend))
         use_pep517 = True
 
     # If we haven't worked out whether to use PEP 517 yet,
@@ -115,28 +181,27 @@ def load_pyproject_toml(
         # In the absence of any explicit backend specification, we
         # assume the setuptools backend that most closely emulates the
         # traditional direct setup.py execution, and require wheel and
-        # a version of setuptools that supports that backend.
-
-        build_system = {
-            "requires": ["setuptools>=40.8.0", "wheel"],
-            "build-backend": "setuptools.build_meta:__legacy__",
-        }
+        # a version of setuptools that supports that backend. These
+        # defaults are known to be valid, so skip the checks below.
+        return BuildSystemDetails(list(_DEFAULT_REQUIRES), _LEGACY_BACKEND, [], [])
 
-    # If we're using PEP 517, we have build system information (either
-    # from pyproject.toml, or defaulted by the code above).
-    # Note that at this point, we do not know if the user has actually
-    # specified a backend, though.
-    assert build_system is not None
+    # If we're using PEP 517, we have build system information from
+    # pyproject.toml. Note that at this point, we do not know if the user
+    # has actually specified a backend, though.
 
     # Ensure that the build-system section in pyproject.toml conforms
     # to PEP 518.
 
-    # Specifying the build-system table but not the requires key is invalid
-    if "requires" not in build_system:
+    # Specifying the build-system table but not the requires key is invalid,
+    # and a build-system that is not a table cannot hold the key at all.
+    if not isinstance(build_system, dict):
         raise MissingPyProjectBuildRequires(package=req_name)
+    try:
+        requires = build_system["requires"]
+    except KeyError:
+        raise MissingPyProjectBuildRequires(package=req_name) from None
 
     # Error out if requires is not a list of strings
-    requires = build_system["requires"]
     if not _is_list_of_str(requires):
         raise InvalidPyProjectBuildRequires(
             package=req_name,
@@ -153,7 +218,6 @@ def load_pyproject_toml(
                 reason=f"It contains an invalid requirement: {requirement!r}",
             ) from error
 
-    backend = build_system.get("build-backend")
     backend_path = build_system.get("backend-path", [])
     check: List[str] = []
     if backend is None:
@@ -169,7 +233,7 @@ def load_pyproject_toml(
         # execute setup.py, but never considered needing to mention the build
         # tools themselves. The original PEP 518 code had a similar check (but
         # implemented in a different way).
-        backend = "setuptools.build_meta:__legacy__"
-        check = ["setuptools>=40.8.0", "wheel"]
+        backend = _LEGACY_BACKEND
+        check = list(_DEFAULT_REQUIRES)
 
     return BuildSystemDetails(requires, backend, check, backend_path)
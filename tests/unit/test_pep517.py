@@ -1,10 +1,16 @@
 import os
 from pathlib import Path
 from textwrap import dedent
+from typing import Callable, Type
 
 import pytest
 
-from pip._internal.exceptions import InstallationError, InvalidPyProjectBuildRequires
+from pip._internal.exceptions import (
+    InstallationError,
+    InvalidPyProjectBuildRequires,
+    MissingPyProjectBuildRequires,
+)
+from pip._internal.pyproject import load_pyproject_toml, read_pyproject_toml, tomllib
 from pip._internal.req import InstallRequirement
 from tests.lib import TestData
 
@@ -97,3 +103,118 @@ def test_pep517_parsing_checks_requirements(tmpdir: Path, spec: str) -> None:
     assert "contains an invalid requirement" in error.context
     assert error.hint_stmt
     assert "PEP 518" in error.hint_stmt
+
+
+def test_read_pyproject_toml_is_cached(
+    tmpdir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pyproject = tmpdir.joinpath("pyproject.toml")
+    pyproject.write_text('[build-system]\nrequires = ["foo"]\n')
+    path = os.fspath(pyproject)
+
+    first = read_pyproject_toml(path)
+    assert first == {"requires": ["foo"]}
+
+    # The second read is answered from the cache without parsing.
+    monkeypatch.setattr("pip._internal.pyproject.tomllib.loads", None)
+    second = read_pyproject_toml(path)
+    assert second == first
+
+    # Mutating a result does not leak into later reads.
+    assert second is not None
+    second["requires"].append("bar")
+    assert read_pyproject_toml(path) == {"requires": ["foo"]}
+    monkeypatch.undo()
+
+    # A change to the file invalidates the cached result. The cache key is
+    # (path, mtime, size), so the rewrite deliberately changes the size: a
+    # same-size rewrite within the filesystem's mtime granularity would not
+    # be noticed.
+    pyproject.write_text('[build-system]\nrequires = ["foo", "bar"]\n')
+    assert read_pyproject_toml(path) == {"requires": ["foo", "bar"]}
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        ("[tool.black]\nline-length = 88\n", None),
+        ('build-system = {requires = ["foo"]}\n', {"requires": ["foo"]}),
+        ('["build\\u002dsystem"]\nrequires = ["foo"]\n', {"requires": ["foo"]}),
+    ],
+)
+def test_read_pyproject_toml_build_system(
+    tmpdir: Path, content: str, expected: object
+) -> None:
+    pyproject = tmpdir.joinpath("pyproject.toml")
+    pyproject.write_text(content)
+    assert read_pyproject_toml(os.fspath(pyproject)) == expected
+
+
+@pytest.mark.parametrize(
+    ("content", "error"),
+    [
+        (b"[tool.x\nfoo=\n", tomllib.TOMLDecodeError),
+        (b"# \xff\n", UnicodeDecodeError),
+    ],
+)
+def test_read_pyproject_toml_rejects_invalid_file(
+    tmpdir: Path, content: bytes, error: Type[Exception]
+) -> None:
+    pyproject = tmpdir.joinpath("pyproject.toml")
+    pyproject.write_bytes(content)
+    with pytest.raises(error):
+        read_pyproject_toml(os.fspath(pyproject))
+
+
+@pytest.mark.parametrize(
+    "make_pyproject",
+    [
+        pytest.param(os.mkdir, id="directory"),
+        pytest.param(
+            lambda path: os.symlink(path, path),
+            id="symlink-loop",
+            marks=pytest.mark.skipif("sys.platform == 'win32'"),
+        ),
+    ],
+)
+def test_load_pyproject_toml_treats_unreadable_path_as_missing(
+    tmpdir: Path, make_pyproject: Callable[[str], None]
+) -> None:
+    pyproject = os.fspath(tmpdir.joinpath("pyproject.toml"))
+    make_pyproject(pyproject)
+    setup_py = os.fspath(tmpdir.joinpath("setup.py"))
+
+    with pytest.raises(InstallationError) as e:
+        load_pyproject_toml(None, pyproject, setup_py, "pkg")
+    assert "does not appear to be a Python project" in e.value.args[0]
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (b"a = 1\rb = 2\r", None),
+        (b'[build-system]\rrequires = ["foo"]\r', {"requires": ["foo"]}),
+    ],
+)
+def test_read_pyproject_toml_cr_line_endings(
+    tmpdir: Path, content: bytes, expected: object
+) -> None:
+    pyproject = tmpdir.joinpath("pyproject.toml")
+    pyproject.write_bytes(content)
+    assert read_pyproject_toml(os.fspath(pyproject)) == expected
+
+
+@pytest.mark.parametrize("build_system", ['"foo"', '""', "[]", '["a"]', "1"])
+def test_load_pyproject_toml_rejects_non_table_build_system(
+    tmpdir: Path, build_system: str
+) -> None:
+    pyproject = os.fspath(tmpdir.joinpath("pyproject.toml"))
+    tmpdir.joinpath("pyproject.toml").write_text(f"build-system = {build_system}\n")
+    setup_py = tmpdir.joinpath("setup.py")
+
+    with pytest.raises(MissingPyProjectBuildRequires):
+        load_pyproject_toml(None, pyproject, os.fspath(setup_py), "pkg")
+
+    # --no-use-pep517 still selects the legacy code path.
+    setup_py.touch()
+    assert load_pyproject_toml(False, pyproject, os.fspath(setup_py), "pkg") is None